@@ -70,6 +70,11 @@ DEFAULT_GLOBAL = {
             "rag_top_k": 5,
             "rag_enabled": False,
             "rag_max_context_chars": 6000,
+            "rag_batch_size": 64,
+            "rag_use_onnx": False,
+            "rag_batch_window_ms": 10,
+            "rag_fp16": True,
+            "rag_fp16_upload": False,
             "rag_auto_ingest": False,
             "rag_scope": "guild",  # guild|channel|author|mixed
             # maintenance
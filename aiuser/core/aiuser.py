@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import re
 from datetime import datetime, timezone
@@ -51,6 +52,10 @@ class AIUser(
         self.ignore_regex: dict[int, re.Pattern] = {}
         self.override_prompt_start_time: dict[int, datetime] = {}
         self.cached_messages: Cache[int, MessageEntry] = Cache(limit=100)
+        self._rag_client: RAG = None
+        self._rag_client_key: tuple = None
+        self._rag_lock = asyncio.Lock()
+        self._recent_history: dict[int, tuple[float, list[discord.Message]]] = {}
 
         self.config.register_member(**DEFAULT_MEMBER)
         self.config.register_role(**DEFAULT_ROLE)
@@ -83,8 +88,8 @@ class AIUser(
             @tasks.loop(minutes=15)
             async def rag_maintenance():
                 try:
-                    rag = await RAG.create(self.config)
-                    if not rag or not await self.config.rag_enabled():
+                    rag = await self._get_rag()
+                    if not rag:
                         return
                     # Retention
                     days = await self.config.rag_retention_days()
@@ -130,9 +135,8 @@ class AIUser(
             # Retrieve RAG context
             context_text, citations = None, None
             try:
-                from aiuser.rag.client import RAG
-                rag = await RAG.create(self.config)
-                if rag and await rag.is_enabled():
+                rag = await self._get_rag()
+                if rag:
                     context_text, citations = await rag.retrieve_context(ctx, prompt)
             except Exception:
                 context_text, citations = None, None
@@ -148,6 +152,8 @@ class AIUser(
         if self.openai_client:
             await self.openai_client.close()
         self.random_message_trigger.cancel()
+        if self._rag_client:
+            await self._rag_client.close()
         try:
             self._rag_maintenance.cancel()
         except Exception:
@@ -188,8 +194,8 @@ class AIUser(
         try:
             if not message or not message.guild or not message.author or message.author.bot:
                 return
-            rag = await RAG.create(self.config)
-            if rag and await rag.is_enabled():
+            rag = await self._get_rag()
+            if rag:
                 await rag.delete_messages_by_ids([message.id])
         except Exception:
             pass
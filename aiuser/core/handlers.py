@@ -15,7 +15,6 @@ from aiuser.core.validators import is_valid_message
 from aiuser.response.dispatcher import dispatch_response
 from aiuser.types.abc import MixinMeta
 from aiuser.utils.utilities import is_embed_valid
-from aiuser.rag.client import RAG
 
 logger = logging.getLogger("red.bz_cogs.aiuser")
 
@@ -81,8 +80,8 @@ async def handle_message(cog: MixinMeta, message: discord.Message):
 
     # Optional RAG auto-ingest of triggering message (respects toggle)
     try:
-        rag = await RAG.create(cog.config)
-        if rag and await rag.is_enabled() and await cog.config.rag_auto_ingest():
+        rag = await cog._get_rag()
+        if rag and await cog.config.rag_auto_ingest():
             await rag.ingest_messages([message])
     except Exception:
         pass
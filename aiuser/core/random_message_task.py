@@ -1,7 +1,9 @@
+import asyncio
 import datetime
 from datetime import timezone
 import logging
 import random
+import time
 
 import discord
 from discord.ext import tasks
@@ -15,6 +17,9 @@ from aiuser.utils.utilities import format_variables
 
 logger = logging.getLogger("red.bz_cogs.aiuser")
 
+# must exceed the loop interval or cache entries always expire before the next visit
+HISTORY_CACHE_TTL_SECONDS = RANDOM_MESSAGE_TASK_RETRY_SECONDS * 3
+
 
 class RandomMessageTask(MixinMeta):
     @tasks.loop(seconds=RANDOM_MESSAGE_TASK_RETRY_SECONDS)
@@ -25,64 +30,88 @@ class RandomMessageTask(MixinMeta):
         if not self.bot.is_ready():
             return
 
-        for guild_id, channels in self.channels_whitelist.items():
-            try:
-                last, ctx = await self.get_discord_context(guild_id, channels)
-            except Exception:
-                continue
+        now = time.monotonic()
+        for channel_id in [cid for cid, (ts, _) in self._recent_history.items() if now - ts >= HISTORY_CACHE_TTL_SECONDS]:
+            del self._recent_history[channel_id]
+
+        # guilds are independent and IO-dominated, so fan out (bounded)
+        sem = asyncio.Semaphore(8)
 
-            guild = last.guild
-            channel = last.channel
+        async def guarded(guild_id, channels):
+            async with sem:
+                try:
+                    await self._maybe_send_random_message(guild_id, channels)
+                except Exception:
+                    logger.exception(f"Failed random message attempt in guild {guild_id}")
 
-            if not await self.check_if_valid_for_random_message(guild, last):
-                return
+        await asyncio.gather(*(guarded(guild_id, channels) for guild_id, channels in self.channels_whitelist.items()))
 
-            # Build context from last 30 messages; pick last 10 relevant to conversation
-            history_msgs = [m async for m in channel.history(limit=30)]
-            # Filter out bot messages and empty content
-            convo = [m for m in history_msgs if not m.author.bot and (m.content or m.attachments or m.stickers)]
-            convo.sort(key=lambda m: m.created_at, reverse=True)
-            convo = convo[:10]
+    async def _maybe_send_random_message(self, guild_id: int, channels: list):
+        try:
+            last, ctx = await self.get_discord_context(guild_id, channels)
+        except Exception:
+            return
+
+        guild = last.guild
+        channel = last.channel
 
-            # Time-based greeting if a user reappears after 4 hours
-            greeting = None
+        if not await self.check_if_valid_for_random_message(guild, last):
+            return
+
+        # Build context from last 30 messages; pick last 10 relevant to conversation
+        cached = self._recent_history.get(channel.id)
+        if cached and time.monotonic() - cached[0] < HISTORY_CACHE_TTL_SECONDS:
+            history_msgs = cached[1]
+        else:
+            history_msgs = [m async for m in channel.history(limit=30)]
+            self._recent_history[channel.id] = (time.monotonic(), history_msgs)
+        # history is newest-first, so the first 10 matches are the most recent
+        convo = []
+        for m in history_msgs:
+            if len(convo) == 10:
+                break
+            if not m.author.bot and (m.content or m.attachments or m.stickers):
+                convo.append(m)
+
+        # Time-based greeting if a user reappears after 4 hours
+        greeting = None
+        try:
+            now = datetime.datetime.now(datetime.timezone(datetime.timedelta(hours=2), name="Europe/Amsterdam"))
+        except Exception:
+            now = datetime.datetime.now(tz=timezone.utc)
+        if len(history_msgs) > 1:
+            last_user_msg = next((m for m in history_msgs if not m.author.bot), None)
+            if last_user_msg:
+                delta = now - last_user_msg.created_at.replace(tzinfo=timezone.utc)
+                if delta.total_seconds() >= 4 * 3600:
+                    hour = now.hour
+                    if 5 <= hour < 12:
+                        greeting = "Good morning"
+                    elif 12 <= hour < 18:
+                        greeting = "Good afternoon"
+                    else:
+                        greeting = "Good evening"
+
+        # Always use DEFAULT_PROMPT for consistency
+        prompt = await format_variables(ctx, DEFAULT_PROMPT)
+        messages_list = await create_messages_list(self, ctx, prompt=prompt, history=False)
+        logger.debug(
+            f"Sending contextual random message to #{channel.name} at {guild.name}")
+        # Inject short instruction to respond related to recent conversation
+        recent_summary_instruction = "Respond briefly and naturally about the ongoing conversation based on the recent messages. Avoid introducing unrelated topics."
+        if greeting:
+            recent_summary_instruction += f" If someone is just arriving after a while, start with '{greeting}'."
+        await messages_list.add_system(recent_summary_instruction, index=len(messages_list) + 1)
+
+        # Add the 10-message context explicitly (as user content)
+        for msg in reversed(convo):
             try:
-                now = datetime.datetime.now(datetime.timezone(datetime.timedelta(hours=2), name="Europe/Amsterdam"))
+                await messages_list.add_msg(msg, index=len(messages_list) + 1, force=True)
             except Exception:
-                now = datetime.datetime.now(tz=timezone.utc)
-            if len(history_msgs) > 1:
-                last_user_msg = next((m for m in history_msgs if not m.author.bot), None)
-                if last_user_msg:
-                    delta = now - last_user_msg.created_at.replace(tzinfo=timezone.utc)
-                    if delta.total_seconds() >= 4 * 3600:
-                        hour = now.hour
-                        if 5 <= hour < 12:
-                            greeting = "Good morning"
-                        elif 12 <= hour < 18:
-                            greeting = "Good afternoon"
-                        else:
-                            greeting = "Good evening"
-
-            # Always use DEFAULT_PROMPT for consistency
-            prompt = await format_variables(ctx, DEFAULT_PROMPT)
-            messages_list = await create_messages_list(self, ctx, prompt=prompt, history=False)
-            logger.debug(
-                f"Sending contextual random message to #{channel.name} at {guild.name}")
-            # Inject short instruction to respond related to recent conversation
-            recent_summary_instruction = "Respond briefly and naturally about the ongoing conversation based on the recent messages. Avoid introducing unrelated topics."
-            if greeting:
-                recent_summary_instruction += f" If someone is just arriving after a while, start with '{greeting}'."
-            await messages_list.add_system(recent_summary_instruction, index=len(messages_list) + 1)
-
-            # Add the 10-message context explicitly (as user content)
-            for msg in reversed(convo):
-                try:
-                    await messages_list.add_msg(msg, index=len(messages_list) + 1, force=True)
-                except Exception:
-                    continue
-            messages_list.can_reply = False
+                continue
+        messages_list.can_reply = False
 
-            return await dispatch_response(self, ctx, messages_list)
+        return await dispatch_response(self, ctx, messages_list)
 
     async def get_discord_context(self, guild_id: int, channels: list):
         guild = self.bot.get_guild(guild_id)
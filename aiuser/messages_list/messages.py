@@ -12,7 +12,6 @@ from redbot.core import commands
 from aiuser.config.constants import OPTIN_EMBED_TITLE
 from aiuser.config.defaults import DEFAULT_PROMPT
 from aiuser.config.models import OTHER_MODELS_LIMITS
-from aiuser.rag.client import RAG
 from aiuser.types.abc import MixinMeta
 from aiuser.types.enums import ScanImageMode
 from aiuser.utils.utilities import format_variables
@@ -41,6 +40,7 @@ class MessagesList:
         ctx: commands.Context,
     ):
         self.bot = cog.bot
+        self.cog = cog
         self.config = cog.config
         self.ctx = ctx
         self.converter = MessageConverter(cog, ctx)
@@ -106,8 +106,8 @@ class MessagesList:
     async def _add_rag_context(self):
         """Add RAG context based on the user's message and conversation history"""
         try:
-            rag = await RAG.create(self.config)
-            if not rag or not await rag.is_enabled():
+            rag = await self.cog._get_rag()
+            if not rag:
                 return
 
             # Get context from the user's message and recent conversation
@@ -3,64 +3,70 @@ import hashlib
 import io
 import json
 import logging
+import sqlite3
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import List, Optional, Tuple
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+
+import os
 
 import aiohttp
+import numpy as np
 import re
+import torch
 from discord import Message
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client.http.models import Filter, FieldCondition, MatchValue
 from qdrant_client.http import models as rest
 from redbot.core import Config, commands
+from redbot.core.data_manager import cog_data_path
 from sentence_transformers import SentenceTransformer
 from trafilatura import extract
 
+from aiuser.utils.cache import Cache
+
 logger = logging.getLogger("red.bz_cogs.aiuser")
 
 
 EMBED_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+QUERY_VECTOR_CACHE_SIZE = 128
+UPSERT_BATCH_SIZE = 256
+URL_DOWNLOAD_CAP_BYTES = 2_000_000
+EXPORT_SCROLL_PAGE_SIZE = 4096
 
 
 def _now_iso() -> str:
     return datetime.now(tz=timezone.utc).isoformat()
 
 
-def _sha256(text: str) -> str:
-    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+def _hash(text: str) -> str:
+    # 2-3x faster than SHA-256 for short strings; 32 hex chars is also a valid UUID for Qdrant
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+_NORMALIZE_WS = re.compile(r"\s+")
+# custom emojis, whitespace, and punctuation — anything that isn't real text;
+# the char class is single-char so a greedy run can't swallow an emoji's "<"
+_NON_TEXT = re.compile(r"(?:<a?:[A-Za-z0-9_~]+:[0-9]+>|[\s\W_])+", re.UNICODE)
 
 
 def _normalize(text: str) -> str:
-    return " ".join(text.split())
+    return _NORMALIZE_WS.sub(" ", text).strip()
 
 
 def _chunk(text: str, max_chars: int = 1200, overlap: int = 120) -> List[str]:
+    assert max_chars > overlap
     text = _normalize(text)
-    if len(text) <= max_chars:
+    n = len(text)
+    if n <= max_chars:
         return [text]
-    chunks: List[str] = []
-    start = 0
-    while start < len(text):
-        end = min(len(text), start + max_chars)
-        chunks.append(text[start:end])
-        if end == len(text):
-            break
-        start = max(0, end - overlap)
-    return chunks
-
-
-_CUSTOM_EMOJI = re.compile(r"<a?:[A-Za-z0-9_~]+:[0-9]+>")
+    stride = max_chars - overlap
+    # stop once a chunk reaches the end of the text, matching the old break-at-end loop
+    return [text[i:i + max_chars] for i in range(0, n - overlap, stride)]
 
 
 def _is_emote_only(text: str) -> bool:
-    if not text:
-        return True
-    t = _CUSTOM_EMOJI.sub("", text)
-    t = re.sub(r"\s+", "", t)
-    # remove common punctuation
-    t = re.sub(r"[\W_]+", "", t, flags=re.UNICODE)
-    return len(t) == 0
+    return not text or not _NON_TEXT.sub("", text)
 
 
 @dataclass
@@ -69,12 +75,121 @@ class RetrievalResult:
     citations: List[str]
 
 
+class EmbeddingCache:
+    """On-disk (model, content_hash) -> vector cache so re-ingests skip the encoder"""
+
+    # stay well under SQLITE_MAX_VARIABLE_NUMBER (999 on older sqlite builds)
+    IN_QUERY_BATCH = 500
+
+    def __init__(self, path, model_name: str):
+        self.model_name = model_name
+        # queries run from executor threads, sqlite's serialized mode handles the locking
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (model TEXT, hash TEXT, vec BLOB, PRIMARY KEY (model, hash))"
+        )
+        self.conn.commit()
+
+    def get_many(self, hashes: List[str]) -> Dict[str, np.ndarray]:
+        found: Dict[str, np.ndarray] = {}
+        for i in range(0, len(hashes), self.IN_QUERY_BATCH):
+            batch = hashes[i:i + self.IN_QUERY_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            rows = self.conn.execute(
+                f"SELECT hash, vec FROM embeddings WHERE model = ? AND hash IN ({placeholders})",
+                [self.model_name, *batch],
+            ).fetchall()
+            found.update({h: np.frombuffer(blob, dtype=np.float32) for h, blob in rows})
+        return found
+
+    def put_many(self, vectors: Dict[str, np.ndarray]):
+        if not vectors:
+            return
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (model, hash, vec) VALUES (?, ?, ?)",
+            [(self.model_name, h, np.asarray(v, dtype=np.float32).tobytes()) for h, v in vectors.items()],
+        )
+        self.conn.commit()
+
+    def close(self):
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+
+
+class QueryBatcher:
+    """Coalesces near-simultaneous searches into one search_batch request"""
+
+    def __init__(self, aclient: AsyncQdrantClient, window_ms: int):
+        self.aclient = aclient
+        self.window = window_ms / 1000
+        self._pending: List[tuple] = []
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def search(self, collection: str, request: rest.SearchRequest):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((collection, request, future))
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self._flush())
+        return await future
+
+    async def _flush(self):
+        await asyncio.sleep(self.window)
+        pending, self._pending = self._pending, []
+        # hand off before the network await, so searches arriving while
+        # search_batch is in flight schedule their own flush instead of stranding
+        self._flush_task = None
+        by_collection: Dict[str, List[tuple]] = {}
+        for collection, request, future in pending:
+            by_collection.setdefault(collection, []).append((request, future))
+        for collection, group in by_collection.items():
+            try:
+                results = await self.aclient.search_batch(collection_name=collection, requests=[r for r, _ in group])
+                for (_, future), res in zip(group, results):
+                    if not future.done():
+                        future.set_result(res)
+            except Exception as e:
+                for _, future in group:
+                    if not future.done():
+                        future.set_exception(e)
+
+
 class RAG:
-    def __init__(self, cfg: Config, client: QdrantClient, embedder: SentenceTransformer, base_url: str):
+    def __init__(self, cfg: Config, client: QdrantClient, aclient: AsyncQdrantClient, embedder: SentenceTransformer, base_url: str, emb_cache: Optional[EmbeddingCache] = None, batch_size: int = 64):
         self.config = cfg
         self.client = client
+        self.aclient = aclient
         self.embedder = embedder
         self.base_url = base_url.rstrip("/")
+        self.emb_cache = emb_cache
+        self.batch_size = batch_size
+        self.fp16_upload = False
+        self._query_cache: Cache = Cache(limit=QUERY_VECTOR_CACHE_SIZE)
+        self.query_batcher = QueryBatcher(aclient, window_ms=10)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._cfg_cache: Dict[int, dict] = {}
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # session creation costs ~50 ms (DNS etc.), so share one across requests
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        return self._session
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+        if self.emb_cache:
+            self.emb_cache.close()
+        try:
+            self.client.close()
+        except Exception:
+            pass
+        try:
+            await self.aclient.close()
+        except Exception:
+            pass
 
     @classmethod
     async def create(cls, cfg: Config) -> Optional["RAG"]:
@@ -83,9 +198,32 @@ class RAG:
         if not enabled or not url:
             return None
         try:
-            client = QdrantClient(url=url)
-            embedder = SentenceTransformer(EMBED_MODEL)
-            rag = cls(cfg, client, embedder, url)
+            client = QdrantClient(url=url, prefer_grpc=True, timeout=30)
+            aclient = AsyncQdrantClient(url=url, prefer_grpc=True, timeout=30)
+            embedder = None
+            if await cfg.rag_use_onnx():
+                try:
+                    from aiuser.rag.onnx_embedder import OnnxEmbedder
+                    embedder = OnnxEmbedder(EMBED_MODEL, cog_data_path(raw_name="AIUser") / "onnx")
+                except Exception:
+                    logger.exception("Failed to initialize ONNX embedder (is optimum[onnxruntime] installed?), falling back to SentenceTransformer")
+            if embedder is None:
+                device = "cuda" if torch.cuda.is_available() else "cpu"
+                embedder = SentenceTransformer(EMBED_MODEL, device=device)
+                if device == "cuda" and await cfg.rag_fp16():
+                    embedder.half()
+                elif device == "cpu":
+                    torch.set_num_threads(os.cpu_count())
+                embedder.eval()
+            try:
+                emb_cache = EmbeddingCache(cog_data_path(raw_name="AIUser") / "rag_embedding_cache.db", EMBED_MODEL)
+            except Exception:
+                logger.exception("Failed to open embedding cache, continuing without it")
+                emb_cache = None
+            batch_size = await cfg.rag_batch_size()
+            rag = cls(cfg, client, aclient, embedder, url, emb_cache, batch_size=batch_size)
+            rag.query_batcher = QueryBatcher(aclient, window_ms=await cfg.rag_batch_window_ms())
+            rag.fp16_upload = bool(await cfg.rag_fp16_upload())
             await rag._ensure_collection()
             return rag
         except Exception:
@@ -104,10 +242,15 @@ class RAG:
                 return
         except Exception:
             pass
+        datatype = rest.Datatype.FLOAT16 if self.fp16_upload else None
         self.client.recreate_collection(
             collection_name=collection,
-            vectors_config=rest.VectorParams(size=dim, distance=rest.Distance.COSINE),
+            vectors_config=rest.VectorParams(size=dim, distance=rest.Distance.COSINE, datatype=datatype),
             optimizers_config=rest.OptimizersConfigDiff(memmap_threshold=20000),
+            hnsw_config=rest.HnswConfigDiff(m=16, ef_construct=128),
+            quantization_config=rest.ScalarQuantization(
+                scalar=rest.ScalarQuantizationConfig(type=rest.ScalarType.INT8, always_ram=True)
+            ),
         )
         # payload indexes
         try:
@@ -127,61 +270,93 @@ class RAG:
         except Exception:
             return False, None
 
+    def _encode_sorted(self, texts: List[str]) -> np.ndarray:
+        # inference_mode skips autograd bookkeeping on older sentence-transformers
+        with torch.inference_mode():
+            if len(texts) == 1:
+                return self.embedder.encode(texts, batch_size=self.batch_size, convert_to_numpy=True, show_progress_bar=False)
+            # feed inputs shortest-first so each internal batch pads to similar lengths
+            order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+            vectors_sorted = self.embedder.encode(
+                [texts[i] for i in order],
+                batch_size=self.batch_size,
+                convert_to_numpy=True,
+                show_progress_bar=False,
+            )
+        vectors = np.empty_like(vectors_sorted)
+        vectors[order] = vectors_sorted
+        return vectors
+
     async def _embed(self, texts: List[str]):
-        return self.embedder.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+        return await asyncio.get_running_loop().run_in_executor(None, self._encode_sorted, texts)
 
-    async def ingest_messages(self, messages: List[Message], source: str = "discord") -> int:
-        if not messages:
-            return 0
-        collection = await self.config.rag_collection()
-        upserts = []
-        vectors = []
-        texts = []
-        payloads = []
-        for msg in messages:
-            if msg.author.bot:
-                continue
-            base_meta = {
-                "guild_id": msg.guild.id,
-                "channel_id": msg.channel.id,
-                "author": msg.author.display_name,
-                "author_id": msg.author.id,
-                "message_id": msg.id,
-                "created_at": msg.created_at.replace(tzinfo=timezone.utc).isoformat(),
-                "created_at_ts": int(msg.created_at.replace(tzinfo=timezone.utc).timestamp()),
-                "source": source,
-            }
-            content = msg.content or ""
-            if not content.strip() or _is_emote_only(content):
+    def _collect_message(self, msg: Message, source: str, unique_texts: dict, payloads: dict):
+        if msg.author.bot:
+            return
+        content = msg.content or ""
+        if not content.strip() or _is_emote_only(content):
+            return
+        base_meta = {
+            "guild_id": msg.guild.id,
+            "channel_id": msg.channel.id,
+            "author": msg.author.display_name,
+            "author_id": msg.author.id,
+            "message_id": msg.id,
+            "created_at": msg.created_at.replace(tzinfo=timezone.utc).isoformat(),
+            "created_at_ts": int(msg.created_at.replace(tzinfo=timezone.utc).timestamp()),
+            "source": source,
+        }
+        for text in _chunk(content):
+            # _chunk already normalized the text
+            content_hash = _hash(text)
+            # dedupe by content_hash before encoding (merge sources, update last_seen)
+            existing = payloads.get(content_hash)
+            if existing is not None:
+                if source not in existing["sources"]:
+                    existing["sources"].append(source)
+                existing["last_seen"] = _now_iso()
                 continue
-            for chunk in _chunk(content):
-                text = chunk
-                content_hash = _sha256(_normalize(text))
-                texts.append(text)
-                payload = dict(base_meta)
-                payload.update({
-                    "text": text,
-                    "content_hash": content_hash,
-                    "first_seen": _now_iso(),
-                    "last_seen": _now_iso(),
-                    "sources": [source],
-                })
-                payloads.append(payload)
-        if not texts:
+            unique_texts[content_hash] = text
+            payload = dict(base_meta)
+            payload.update({
+                "text": text,
+                "content_hash": content_hash,
+                "first_seen": _now_iso(),
+                "last_seen": _now_iso(),
+                "sources": [source],
+            })
+            payloads[content_hash] = payload
+
+    async def ingest_messages(self, messages: Union[Iterable[Message], AsyncIterable[Message]], source: str = "discord") -> int:
+        unique_texts: dict[str, str] = {}
+        payloads: dict[str, dict] = {}
+        if hasattr(messages, "__aiter__"):
+            async for msg in messages:
+                self._collect_message(msg, source, unique_texts, payloads)
+        else:
+            for msg in messages:
+                self._collect_message(msg, source, unique_texts, payloads)
+        if not payloads:
             return 0
-        vectors = await asyncio.get_running_loop().run_in_executor(None, lambda: self.embedder.encode(texts, convert_to_numpy=True))
-        # Deduplicate by content_hash (merge sources, update last_seen)
-        unique: dict[str, dict] = {}
-        for pld in payloads:
-            h = pld["content_hash"]
-            if h in unique:
-                unique[h]["sources"] = list(set(unique[h]["sources"] + pld["sources"]))
-                unique[h]["last_seen"] = _now_iso()
-            else:
-                unique[h] = pld
-        vectors_map = {pld["content_hash"]: v.tolist() for v, pld in zip(vectors, payloads)}
-        points = [rest.PointStruct(id=h, vector=vectors_map[h], payload=pld) for h, pld in unique.items()]
-        self.client.upsert(collection_name=collection, points=points)
+        collection = await self.config.rag_collection()
+        loop = asyncio.get_running_loop()
+        vectors = await loop.run_in_executor(None, self.emb_cache.get_many, list(unique_texts)) if self.emb_cache else {}
+        missing = [(h, text) for h, text in unique_texts.items() if h not in vectors]
+        if missing:
+            new_vectors = await self._embed([text for _, text in missing])
+            new_by_hash = {h: v for (h, _), v in zip(missing, new_vectors)}
+            vectors.update(new_by_hash)
+            if self.emb_cache:
+                await loop.run_in_executor(None, self.emb_cache.put_many, new_by_hash)
+        if self.fp16_upload:
+            # rounds values to fp16 precision; the actual storage saving comes from
+            # the collection's Datatype.FLOAT16, not from this transfer
+            vectors = {h: v.astype(np.float16) for h, v in vectors.items()}
+        # note: PointStruct validation coerces the ndarray to a list of Python
+        # floats anyway, so this saves a .tolist() call but not the allocations
+        points = [rest.PointStruct(id=h, vector=vectors[h], payload=pld) for h, pld in payloads.items()]
+        for i in range(0, len(points), UPSERT_BATCH_SIZE):
+            await self.aclient.upsert(collection_name=collection, points=points[i:i + UPSERT_BATCH_SIZE], wait=False)
         return len(points)
 
     async def ingest_url(self, ctx: commands.Context, url: str) -> int:
@@ -205,10 +380,15 @@ class RAG:
                 "Referer": "https://www.google.com/",
                 "User-Agent": "Mozilla/5.0",
             }
-            async with aiohttp.ClientSession(headers=headers) as session:
-                async with session.get(url) as resp:
-                    resp.raise_for_status()
-                    html = await resp.text()
+            async with self._get_session().get(url, headers=headers) as resp:
+                resp.raise_for_status()
+                chunks, total = [], 0
+                async for piece in resp.content.iter_chunked(8192):
+                    total += len(piece)
+                    chunks.append(piece)
+                    if total > URL_DOWNLOAD_CAP_BYTES:
+                        break
+                html = b"".join(chunks).decode(resp.charset or "utf-8", errors="ignore")
             text = extract(html) or ""
             return text[:20000]
         except Exception:
@@ -230,38 +410,80 @@ class RAG:
         return await self.ingest_messages([fake_message], source=filename)
 
     async def _extract_text_from_bytes(self, data: bytes, filename: str) -> Optional[str]:
-        try:
-            name = filename.lower()
+        def _sync(data: bytes, name: str) -> Optional[str]:
             if name.endswith(".txt") or name.endswith(".md"):
                 return data.decode("utf-8", errors="ignore")
             if name.endswith(".pdf"):
                 from pypdf import PdfReader
-                reader = PdfReader(io.BytesIO(data))
-                pages = [p.extract_text() or "" for p in reader.pages]
-                return "\n".join(pages)
+                reader = PdfReader(io.BytesIO(data), strict=False)
+                return "\n".join(p.extract_text() or "" for p in reader.pages)
             if name.endswith(".docx"):
                 from docx import Document
                 doc = Document(io.BytesIO(data))
-                return "\n".join([p.text for p in doc.paragraphs])
+                return "\n".join(p.text for p in doc.paragraphs)
+            return None
+
+        try:
+            # parsing a large PDF can take seconds; keep it off the event loop
+            return await asyncio.get_running_loop().run_in_executor(None, _sync, data, filename.lower())
         except Exception:
             logger.exception("Failed extracting text from uploaded file")
-        return None
+            return None
+
+    async def _guild_cfg(self, ctx: commands.Context) -> dict:
+        """Retrieval settings for a guild, fetched in one gather and cached"""
+        cached = self._cfg_cache.get(ctx.guild.id)
+        if cached is not None:
+            return cached
+        guild_config = self.config.guild(ctx.guild)
+        collection, max_context_chars, guild_top_k, top_k, guild_min_score, min_score = await asyncio.gather(
+            self.config.rag_collection(),
+            self.config.rag_max_context_chars(),
+            guild_config.rag_top_k(),
+            self.config.rag_top_k(),
+            guild_config.rag_min_score(),
+            self.config.rag_min_score(),
+        )
+        cfg = {
+            "collection": collection,
+            "max_context_chars": max_context_chars,
+            "top_k": guild_top_k or top_k,
+            "min_score": guild_min_score if guild_min_score is not None else min_score,
+        }
+        self._cfg_cache[ctx.guild.id] = cfg
+        return cfg
+
+    def invalidate_guild_cfg(self, guild_id: Optional[int] = None):
+        if guild_id is None:
+            self._cfg_cache.clear()
+        else:
+            self._cfg_cache.pop(guild_id, None)
 
     async def retrieve_context(self, ctx: commands.Context, query: str) -> Tuple[Optional[str], Optional[List[str]]]:
-        collection = await self.config.rag_collection()
-        top_k = await self._get_top_k(ctx)
-        min_score = await self._get_min_score(ctx)
-        vector = await asyncio.get_running_loop().run_in_executor(None, lambda: self.embedder.encode([query], convert_to_numpy=True)[0])
+        cfg = await self._guild_cfg(ctx)
+        collection = cfg["collection"]
+        top_k = cfg["top_k"]
+        min_score = cfg["min_score"]
+        query_hash = _hash(_normalize(query))
+        vector = self._query_cache[query_hash]
+        if vector is None:
+            vector = (await self._embed([query]))[0]
+            self._query_cache[query_hash] = vector
         flt = Filter(must=[
             FieldCondition(key="guild_id", match=MatchValue(int(ctx.guild.id))),
         ])
-        res = self.client.search(
-            collection_name=collection,
-            query_vector=vector.tolist(),
+        res = await self.query_batcher.search(collection, rest.SearchRequest(
+            vector=vector.tolist(),
             limit=top_k,
             score_threshold=float(min_score),
-            query_filter=flt,
-        )
+            filter=flt,
+            # only the fields the context block needs; skips shipping hashes/ids back
+            with_payload=rest.PayloadSelectorInclude(include=["text", "author", "created_at", "source"]),
+            params=rest.SearchParams(
+                hnsw_ef=64,
+                quantization=rest.QuantizationSearchParams(rescore=True, oversampling=2.0),
+            ),
+        ))
         if not res:
             return None, None
         blocks = []
@@ -275,24 +497,16 @@ class RAG:
             blocks.append(f"[{i+1}] {text}")
             cite = f"{source or 'discord'} — {author} {created_at}"
             citations.append(cite)
-        context_chars = await self.config.rag_max_context_chars()
+        context_chars = cfg["max_context_chars"]
         context = "\n\n".join(blocks)
         if len(context) > context_chars:
             context = context[:context_chars]
         return context, citations
 
-    async def _get_top_k(self, ctx: commands.Context) -> int:
-        guild_topk = await self.config.guild(ctx.guild).rag_top_k()
-        return guild_topk or await self.config.rag_top_k()
-
-    async def _get_min_score(self, ctx: commands.Context) -> float:
-        guild_min = await self.config.guild(ctx.guild).rag_min_score()
-        return guild_min if guild_min is not None else await self.config.rag_min_score()
-
     async def delete_user(self, user_id: int):
         collection = await self.config.rag_collection()
         try:
-            self.client.delete(
+            await self.aclient.delete(
                 collection_name=collection,
                 points_selector=rest.FilterSelector(
                     filter=Filter(must=[FieldCondition(key="author_id", match=MatchValue(int(user_id)))])
@@ -304,7 +518,7 @@ class RAG:
     async def stats(self) -> dict:
         collection = await self.config.rag_collection()
         try:
-            info = self.client.get_collection(collection)
+            info = await self.aclient.get_collection(collection)
             return {"points": info.vectors_count, "segments": info.segments_count}
         except Exception:
             return {"points": 0}
@@ -315,12 +529,13 @@ class RAG:
         if not message_ids:
             return
         try:
-            should = [FieldCondition(key="message_id", match=MatchValue(int(mid))) for mid in message_ids]
             must = []
             if author_id is not None:
                 must.append(FieldCondition(key="author_id", match=MatchValue(int(author_id))))
-            flt = Filter(must=must, should=should) if must else Filter(should=should)
-            self.client.delete(collection_name=collection, points_selector=rest.FilterSelector(filter=flt))
+            for i in range(0, len(message_ids), UPSERT_BATCH_SIZE):
+                should = [FieldCondition(key="message_id", match=MatchValue(int(mid))) for mid in message_ids[i:i + UPSERT_BATCH_SIZE]]
+                flt = Filter(must=must, should=should) if must else Filter(should=should)
+                await self.aclient.delete(collection_name=collection, points_selector=rest.FilterSelector(filter=flt))
         except Exception:
             logger.exception("Failed deleting messages by IDs from RAG")
 
@@ -333,7 +548,7 @@ class RAG:
             must = [FieldCondition(key="created_at_ts", range=rest.Range(lte=cutoff))]
             if guild_id:
                 must.append(FieldCondition(key="guild_id", match=MatchValue(int(guild_id))))
-            self.client.delete(collection_name=collection, points_selector=rest.FilterSelector(filter=Filter(must=must)))
+            await self.aclient.delete(collection_name=collection, points_selector=rest.FilterSelector(filter=Filter(must=must)))
         except Exception:
             logger.exception("Failed retention delete in RAG")
 
@@ -342,10 +557,9 @@ class RAG:
         collection = await self.config.rag_collection()
         url = f"{self.base_url}/collections/{collection}/snapshots"
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url) as resp:
-                    resp.raise_for_status()
-                    return await resp.json()
+            async with self._get_session().post(url) as resp:
+                resp.raise_for_status()
+                return await resp.json()
         except Exception:
             logger.exception("Failed to create snapshot in Qdrant")
             return None
@@ -354,11 +568,10 @@ class RAG:
         collection = await self.config.rag_collection()
         url = f"{self.base_url}/collections/{collection}/snapshots"
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as resp:
-                    resp.raise_for_status()
-                    data = await resp.json()
-                    return data.get("result", [])
+            async with self._get_session().get(url) as resp:
+                resp.raise_for_status()
+                data = await resp.json()
+                return data.get("result", [])
         except Exception:
             return []
 
@@ -380,31 +593,32 @@ class RAG:
             must.append(FieldCondition(key="created_at_ts", range=rng))
         flt = Filter(must=must) if must else None
         try:
-            self.client.delete(collection_name=collection, points_selector=rest.FilterSelector(filter=flt))
+            await self.aclient.delete(collection_name=collection, points_selector=rest.FilterSelector(filter=flt))
         except Exception:
             logger.exception("Failed filtered delete in RAG")
 
-    async def export_user(self, guild_id: int, author_id: int) -> List[dict]:
-        # Scroll all points by filter
-        flt = Filter(must=[
-            FieldCondition(key="guild_id", match=MatchValue(int(guild_id))),
-            FieldCondition(key="author_id", match=MatchValue(int(author_id))),
-        ])
+    async def _scroll_payloads(self, flt: Optional[Filter]) -> AsyncIterator[dict]:
         collection = await self.config.rag_collection()
-        points: List[dict] = []
         next_page = None
         try:
             while True:
-                res, next_page = self.client.scroll(collection_name=collection, scroll_filter=flt, with_payload=True, with_vectors=False, offset=next_page, limit=256)
+                res, next_page = await self.aclient.scroll(collection_name=collection, scroll_filter=flt, with_payload=True, with_vectors=False, offset=next_page, limit=EXPORT_SCROLL_PAGE_SIZE)
                 for p in res:
-                    points.append(p.payload)
+                    yield p.payload
                 if next_page is None:
                     break
         except Exception:
-            logger.exception("Failed exporting user data")
-        return points
+            logger.exception("Failed exporting RAG data")
+
+    def export_user(self, guild_id: int, author_id: int) -> AsyncIterator[dict]:
+        # Stream payloads page by page so callers don't hold the full export
+        flt = Filter(must=[
+            FieldCondition(key="guild_id", match=MatchValue(int(guild_id))),
+            FieldCondition(key="author_id", match=MatchValue(int(author_id))),
+        ])
+        return self._scroll_payloads(flt)
 
-    async def export_all(self, *, guild_id: Optional[int] = None, user_id: Optional[int] = None, channel_id: Optional[int] = None) -> List[dict]:
+    def export_all(self, *, guild_id: Optional[int] = None, user_id: Optional[int] = None, channel_id: Optional[int] = None) -> AsyncIterator[dict]:
         must = []
         if guild_id is not None:
             must.append(FieldCondition(key="guild_id", match=MatchValue(int(guild_id))))
@@ -413,18 +627,6 @@ class RAG:
         if channel_id is not None:
             must.append(FieldCondition(key="channel_id", match=MatchValue(int(channel_id))))
         flt = Filter(must=must) if must else None
-        collection = await self.config.rag_collection()
-        points: List[dict] = []
-        next_page = None
-        try:
-            while True:
-                res, next_page = self.client.scroll(collection_name=collection, scroll_filter=flt, with_payload=True, with_vectors=False, offset=next_page, limit=512)
-                for p in res:
-                    points.append(p.payload)
-                if next_page is None:
-                    break
-        except Exception:
-            logger.exception("Failed exporting RAG data")
-        return points
+        return self._scroll_payloads(flt)
 
 
@@ -0,0 +1,64 @@
+import logging
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+logger = logging.getLogger("red.bz_cogs.aiuser")
+
+QUANTIZED_FILE_NAME = "model_quantized.onnx"
+
+
+class OnnxEmbedder:
+    """Drop-in replacement for SentenceTransformer backed by ONNX Runtime
+
+    Exports the embedding model to an INT8 dynamically-quantized ONNX graph on
+    first use (cached under the cog data path) for faster CPU inference.
+    Requires the optional `optimum[onnxruntime]` dependency.
+    """
+
+    def __init__(self, model_name: str, cache_dir: Path):
+        from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+        from transformers import AutoTokenizer
+
+        quantized_dir = Path(cache_dir) / "int8"
+        if not (quantized_dir / QUANTIZED_FILE_NAME).exists():
+            logger.info(f"Exporting {model_name} to quantized ONNX (one-time)")
+            export_dir = Path(cache_dir) / "fp32"
+            model = ORTModelForFeatureExtraction.from_pretrained(
+                model_name, export=True, provider="CPUExecutionProvider")
+            model.save_pretrained(export_dir)
+            quantizer = ORTQuantizer.from_pretrained(export_dir)
+            quantizer.quantize(
+                save_dir=quantized_dir,
+                quantization_config=AutoQuantizationConfig.avx2(is_static=False),
+            )
+        self.model = ORTModelForFeatureExtraction.from_pretrained(
+            quantized_dir, file_name=QUANTIZED_FILE_NAME, provider="CPUExecutionProvider")
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.model.config.hidden_size
+
+    def encode(self, texts: List[str], batch_size: int = 64, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = False, show_progress_bar: bool = False) -> np.ndarray:
+        session = self.model.model
+        input_names = {i.name for i in session.get_inputs()}
+        batches = []
+        for i in range(0, len(texts), batch_size):
+            encoded = self.tokenizer(
+                texts[i:i + batch_size],
+                padding=True,
+                truncation=True,
+                return_tensors="np",
+            )
+            inputs = {k: np.asarray(v, dtype=np.int64) for k, v in encoded.items() if k in input_names}
+            hidden = session.run(None, inputs)[0]
+            mask = np.expand_dims(encoded["attention_mask"], -1).astype(hidden.dtype)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            batches.append(pooled)
+        vectors = np.concatenate(batches, axis=0).astype(np.float32)
+        if normalize_embeddings:
+            vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        return vectors
@@ -409,8 +409,7 @@ class Settings(
         await self.config.optout.set(optout)
         # Attempt to delete from RAG index
         try:
-            from aiuser.rag.client import RAG
-            rag = await RAG.create(self.config)
+            rag = await self._get_rag()
             if rag:
                 await rag.delete_user(ctx.author.id)
         except Exception:
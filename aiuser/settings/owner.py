@@ -1,6 +1,6 @@
 import asyncio
-import json
 import logging
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional
 
@@ -12,12 +12,15 @@ from redbot.core.utils.predicates import ReactionPredicate
 
 from aiuser.config.defaults import DEFAULT_LLM_MODEL
 from aiuser.core.openai_utils import setup_openai_client
+from aiuser.rag.client import RAG
 from aiuser.settings.utilities import get_tokens, truncate_prompt
 from aiuser.types.abc import MixinMeta
 from aiuser.types.enums import ScanImageMode
 from aiuser.utils.utilities import (
     is_using_openai_endpoint,
     is_using_openrouter_endpoint,
+    json_dumps_bytes,
+    json_loads,
 )
 
 logger = logging.getLogger("red.bz_cogs.aiuser")
@@ -80,17 +83,24 @@ class OwnerSettings(MixinMeta):
             url = None
 
         previous_url = await self.config.custom_openai_endpoint()
-        
+        if url == previous_url:
+            embed = discord.Embed(
+                title="Bot Custom OpenAI endpoint",
+                description="Endpoint unchanged.",
+                color=await ctx.embed_color(),
+            )
+            return await ctx.send(embed=embed)
+        all_guild_data = await self.config.all_guilds()
+        all_guild_ids = list(all_guild_data)
+        total_guilds = len(all_guild_ids)
+        history = await self.config.endpoint_model_history()
+
         # Save current models before switching
         if previous_url:
-            history = await self.config.endpoint_model_history()
-            history[previous_url] = {}
-            for guild_id in await self.config.all_guilds():
-                guild_config = self.config.guild_from_id(guild_id)
-                history[previous_url][str(guild_id)] = {
-                    "chat_model": await guild_config.model(),
-                    "image_model": await guild_config.scan_images_model()
-                }
+            history[previous_url] = {
+                str(guild_id): {"chat_model": data["model"], "image_model": data["scan_images_model"]}
+                for guild_id, data in all_guild_data.items()
+            }
             await self.config.endpoint_model_history.set(history)
         
         await self.config.custom_openai_endpoint.set(url)
@@ -109,7 +119,6 @@ class OwnerSettings(MixinMeta):
             await ctx.message.remove_reaction("🔄", ctx.me)
 
         # Check if we have saved models for this endpoint
-        history = await self.config.endpoint_model_history()
         saved_models = history.get(url or "default", {})
         
         chat_model = DEFAULT_LLM_MODEL
@@ -127,24 +136,35 @@ class OwnerSettings(MixinMeta):
         )
         
         restored_count = 0
-        guilds_with_parameters = []
-        for guild_id in await self.config.all_guilds():
+
+        # Restore saved models if available, otherwise use defaults
+        async def set_models(guild_id: int, chat: str, image: str):
+            # per-key sets only; writing the whole group would materialize
+            # every default as a stored value and pin it forever
             guild_config = self.config.guild_from_id(guild_id)
-            
-            # Restore saved models if available, otherwise use defaults
-            if str(guild_id) in saved_models:
-                await guild_config.model.set(saved_models[str(guild_id)]["chat_model"])
-                await guild_config.scan_images_model.set(saved_models[str(guild_id)]["image_model"])
+            await guild_config.model.set(chat)
+            await guild_config.scan_images_model.set(image)
+
+        write_coros = []
+        for guild_id in all_guild_ids:
+            saved = saved_models.get(str(guild_id))
+            if saved:
+                write_coros.append(set_models(guild_id, saved["chat_model"], saved["image_model"]))
                 restored_count += 1
             else:
-                await guild_config.model.set(chat_model)
-                await guild_config.scan_images_model.set(image_model)
-            
-            if await guild_config.parameters():
-                guilds_with_parameters.append(str(self.bot.get_guild(guild_id).name))
+                write_coros.append(set_models(guild_id, chat_model, image_model))
+        await asyncio.gather(*write_coros)
+
+        guilds_with_parameters = []
+        for guild_id, data in all_guild_data.items():
+            if not data["parameters"]:
+                continue
+            guild = self.bot.get_guild(guild_id)
+            # stale config can outlive guilds the bot has since left
+            if guild is not None:
+                guilds_with_parameters.append(guild.name)
 
         if restored_count > 0:
-            total_guilds = len(await self.config.all_guilds())
             value = f"Restored previously set models on this endpoint for {restored_count} servers."
             if restored_count < total_guilds:
                 value += f"\nA further {total_guilds - restored_count} servers were set to `{chat_model}` for chat, and \n`{image_model}` for scanning images if set to `{ScanImageMode.LLM.value}` mode."
@@ -225,12 +245,11 @@ class OwnerSettings(MixinMeta):
     @rag_backup_group.command(name="now")
     async def rag_backup_now(self, ctx: commands.Context):
         try:
-            from aiuser.rag.client import RAG
-            rag = await RAG.create(self.config)
-            if not rag or not await self.config.rag_enabled():
+            rag = await self._get_rag()
+            if not rag:
                 return await ctx.send("RAG disabled or misconfigured")
             res = await rag.create_snapshot(await self.config.rag_backup_dir())
-            await self.config.rag_last_backup_at.set(datetime.utcnow().isoformat())
+            await self.config.rag_last_backup_at.set(datetime.now(timezone.utc).isoformat(timespec="seconds"))
             await ctx.send(f"Snapshot triggered: `{bool(res)}`")
         except Exception:
             await ctx.send("Snapshot failed")
@@ -263,9 +282,10 @@ class OwnerSettings(MixinMeta):
             return await ctx.send(":warning: No file was attached.")
 
         file = ctx.message.attachments[0]
+        raw = await file.read()
         try:
-            new_config = json.loads(await file.read())
-        except json.JSONDecodeError:
+            new_config = await asyncio.get_running_loop().run_in_executor(None, json_loads, raw)
+        except ValueError:
             return await ctx.send(":warning: Invalid JSON format!")
 
         path = Path(cog_data_path(self) / "settings.json")
@@ -289,8 +309,11 @@ class OwnerSettings(MixinMeta):
         if pred.result is False:
             return await confirm.edit(embed=discord.Embed(title="Cancelled.", color=await ctx.embed_color()))
 
-        with path.open("w") as f:
-            json.dump(new_config, f, indent=4)
+        # serializing a multi-MB config would otherwise block the event loop
+        def _sync_write():
+            path.write_bytes(json_dumps_bytes(new_config))
+
+        await asyncio.get_running_loop().run_in_executor(None, _sync_write)
 
         return await confirm.edit(embed=discord.Embed(
             title="Overwritten!",
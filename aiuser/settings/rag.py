@@ -1,10 +1,88 @@
+import asyncio
+import os
+import re
+import shlex
+import tempfile
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
 import discord
 from redbot.core import checks, commands
 
+from aiuser.rag.client import RAG
 from aiuser.types.abc import MixinMeta
+from aiuser.utils.utilities import json_dumps_compact
+
+try:
+    import dateutil.parser as dp
+except ImportError:  # optional; date filters in [p]rag clear need it
+    dp = None
+
+_FLAG_RE = re.compile(r"--(?P<key>before|after|user|channel|ids)(?:=(?P<value>\S+))?")
+
+
+def _parse_flags(flags: str) -> dict:
+    """Single-pass parse of --key[=value] tokens; last occurrence of a key wins"""
+    return {m.group("key"): m.group("value") for m in _FLAG_RE.finditer(flags)}
+
+
+async def _spool_export(payloads: AsyncIterator[dict]) -> Path:
+    """Streams export payloads to a temp file so large collections never sit in memory"""
+    loop = asyncio.get_running_loop()
+    fd, name = tempfile.mkstemp(prefix="rag_export_", suffix=".json")
+    path = Path(name)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(b"[")
+            batch = []
+            sep = b""
+            async for payload in payloads:
+                batch.append(payload)
+                if len(batch) >= 1000:
+                    blob = sep + json_dumps_compact(batch)[1:-1]
+                    await loop.run_in_executor(None, f.write, blob)
+                    sep = b","
+                    batch = []
+            if batch:
+                await loop.run_in_executor(None, f.write, sep + json_dumps_compact(batch)[1:-1])
+            f.write(b"]")
+    except BaseException:
+        # callers only unlink after a successful return, so clean up here
+        path.unlink(missing_ok=True)
+        raise
+    return path
 
 
 class RagSettings(MixinMeta):
+    async def _get_rag(self) -> Optional[RAG]:
+        """Returns a cached long-lived RAG client, recreated when its config changes"""
+        key = (
+            await self.config.rag_enabled(),
+            await self.config.rag_qdrant_url(),
+            await self.config.rag_collection(),
+        )
+        if self._rag_client is not None and self._rag_client_key == key:
+            return self._rag_client
+        # serialize creation: every incoming message lands here, and RAG.create
+        # loads the embedding model — parallel creates would block the loop
+        # repeatedly and leak the overwritten clients
+        async with self._rag_lock:
+            if self._rag_client is None or self._rag_client_key != key:
+                await self._close_rag()
+                self._rag_client = await RAG.create(self.config)
+                self._rag_client_key = key
+            return self._rag_client
+
+    async def _close_rag(self):
+        if self._rag_client is not None:
+            await self._rag_client.close()
+        self._rag_client = None
+        self._rag_client_key = None
+
+    async def _invalidate_rag(self):
+        async with self._rag_lock:
+            await self._close_rag()
+
     @commands.group(name="rag")
     async def rag(self, _):
         """RAG (Qdrant) configuration and operations"""
@@ -15,6 +93,7 @@ class RagSettings(MixinMeta):
     async def rag_enable(self, ctx: commands.Context):
         val = not await self.config.rag_enabled()
         await self.config.rag_enabled.set(val)
+        await self._invalidate_rag()
         await ctx.send(f"RAG enabled: `{val}`")
 
     @rag.command(name="qdrant")
@@ -23,16 +102,21 @@ class RagSettings(MixinMeta):
         await self.config.rag_qdrant_url.set(url)
         if collection:
             await self.config.rag_collection.set(collection)
+        await self._invalidate_rag()
         await ctx.send(f"Set Qdrant URL to `{url}`" + (f", collection `{collection}`" if collection else ""))
 
     @rag.command(name="minscore")
     async def rag_threshold(self, ctx: commands.Context, min_score: float):
         await self.config.guild(ctx.guild).rag_min_score.set(min_score)
+        if self._rag_client is not None:
+            self._rag_client.invalidate_guild_cfg(ctx.guild.id)
         await ctx.send(f"Set RAG min score to `{min_score}` for this server")
 
     @rag.command(name="topk")
     async def rag_topk(self, ctx: commands.Context, k: int):
         await self.config.guild(ctx.guild).rag_top_k.set(k)
+        if self._rag_client is not None:
+            self._rag_client.invalidate_guild_cfg(ctx.guild.id)
         await ctx.send(f"Set RAG top-k to `{k}` for this server")
 
     @rag.command(name="autoingest")
@@ -53,8 +137,7 @@ class RagSettings(MixinMeta):
     @rag.command(name="health")
     async def rag_health(self, ctx: commands.Context):
         try:
-            from aiuser.rag.client import RAG
-            rag = await RAG.create(self.config)
+            rag = await self._get_rag()
             if not rag:
                 return await ctx.send("RAG disabled or misconfigured")
             healthy, error = await rag.health()
@@ -68,8 +151,7 @@ class RagSettings(MixinMeta):
     @rag.command(name="stats")
     async def rag_stats(self, ctx: commands.Context):
         try:
-            from aiuser.rag.client import RAG
-            rag = await RAG.create(self.config)
+            rag = await self._get_rag()
             if not rag:
                 return await ctx.send("RAG disabled or misconfigured")
             stats = await rag.stats()
@@ -84,12 +166,10 @@ class RagSettings(MixinMeta):
     async def rag_add_here(self, ctx: commands.Context, limit: int = 200):
         """Add recent messages from this channel to RAG"""
         try:
-            from aiuser.rag.client import RAG
-            rag = await RAG.create(self.config)
+            rag = await self._get_rag()
             if not rag:
                 return await ctx.send("RAG disabled or misconfigured")
-            messages = [m async for m in ctx.channel.history(limit=limit)]
-            cnt = await rag.ingest_messages(messages)
+            cnt = await rag.ingest_messages(ctx.channel.history(limit=limit))
             await ctx.send(f"Indexed `{cnt}` chunks from `{limit}` messages")
         except Exception:
             await ctx.send("Failed to add messages to RAG")
@@ -98,8 +178,7 @@ class RagSettings(MixinMeta):
     async def rag_add_url(self, ctx: commands.Context, url: str):
         """Add content from a URL to RAG"""
         try:
-            from aiuser.rag.client import RAG
-            rag = await RAG.create(self.config)
+            rag = await self._get_rag()
             if not rag:
                 return await ctx.send("RAG disabled or misconfigured")
             cnt = await rag.ingest_url(ctx, url)
@@ -114,8 +193,7 @@ class RagSettings(MixinMeta):
         data = await ctx.message.attachments[0].read()
         filename = ctx.message.attachments[0].filename
         try:
-            from aiuser.rag.client import RAG
-            rag = await RAG.create(self.config)
+            rag = await self._get_rag()
             if not rag:
                 return await ctx.send("RAG disabled or misconfigured")
             cnt = await rag.ingest_bytes(ctx, data, filename)
@@ -126,8 +204,7 @@ class RagSettings(MixinMeta):
     @rag.command(name="search")
     async def rag_search(self, ctx: commands.Context, *, query: str):
         try:
-            from aiuser.rag.client import RAG
-            rag = await RAG.create(self.config)
+            rag = await self._get_rag()
             if not rag:
                 return await ctx.send("RAG disabled or misconfigured")
             context, cites = await rag.retrieve_context(ctx, query)
@@ -151,24 +228,29 @@ class RagSettings(MixinMeta):
     async def privacy_delete_mine(self, ctx: commands.Context, *, ids_or_flags: str = ""):
         """Delete your indexed messages from RAG. Options: --reply | --ids <id1,id2> | --since <minutes> | --all"""
         try:
-            from aiuser.rag.client import RAG
-            rag = await RAG.create(self.config)
+            rag = await self._get_rag()
             if not rag:
                 return await ctx.send("RAG disabled or misconfigured")
             # Parse flags
+            try:
+                tokens = shlex.split(ids_or_flags)
+            except ValueError:
+                tokens = ids_or_flags.split()
             ids: list[int] = []
-            if "--reply" in ids_or_flags and ctx.message.reference:
-                ids.append(ctx.message.reference.message_id)
-            if "--ids" in ids_or_flags:
-                try:
-                    part = ids_or_flags.split("--ids", 1)[1].strip()
-                    if part.startswith(" "):
-                        part = part.strip()
-                    csv = part.split()[0]
-                    ids.extend(int(x.strip()) for x in csv.split(",") if x.strip())
-                except Exception:
-                    pass
-            if "--all" in ids_or_flags:
+            delete_all = False
+            it = iter(tokens)
+            for token in it:
+                if token == "--reply" and ctx.message.reference:
+                    ids.append(ctx.message.reference.message_id)
+                elif token == "--all":
+                    delete_all = True
+                elif token.startswith("--ids"):
+                    csv = token[len("--ids="):] if token.startswith("--ids=") else next(it, "")
+                    try:
+                        ids.extend(int(x.strip()) for x in csv.split(",") if x.strip())
+                    except ValueError:
+                        return await ctx.send(":warning: --ids takes a comma-separated list of message ids")
+            if delete_all:
                 # Use author_id filter (implemented via delete_user)
                 await rag.delete_user(ctx.author.id)
                 return await ctx.send("Deleted all your indexed data.")
@@ -182,15 +264,14 @@ class RagSettings(MixinMeta):
     @privacy.command(name="export-mine")
     async def privacy_export_mine(self, ctx: commands.Context):
         try:
-            from aiuser.rag.client import RAG
-            rag = await RAG.create(self.config)
+            rag = await self._get_rag()
             if not rag:
                 return await ctx.send("RAG disabled or misconfigured")
-            data = await rag.export_user(ctx.guild.id, ctx.author.id)
-            import json
-            from io import BytesIO
-            buf = BytesIO(json.dumps(data, indent=2).encode("utf-8"))
-            await ctx.author.send(file=discord.File(buf, filename=f"rag_export_{ctx.guild.id}_{ctx.author.id}.json"))
+            path = await _spool_export(rag.export_user(ctx.guild.id, ctx.author.id))
+            try:
+                await ctx.author.send(file=discord.File(path, filename=f"rag_export_{ctx.guild.id}_{ctx.author.id}.json"))
+            finally:
+                path.unlink(missing_ok=True)
             await ctx.send("DM'd your export.")
         except Exception:
             await ctx.send("Export failed")
@@ -199,24 +280,14 @@ class RagSettings(MixinMeta):
     async def rag_clear(self, ctx: commands.Context, *, flags: str = ""):
         """Clear RAG data with filters: --user @x --channel #y --before ISO --after ISO | no flags clears guild."""
         try:
-            from aiuser.rag.client import RAG
-            rag = await RAG.create(self.config)
+            rag = await self._get_rag()
             if not rag:
                 return await ctx.send("RAG disabled or misconfigured")
-            user = None
-            channel = None
-            before_ts = None
-            after_ts = None
-            if "--user" in flags and ctx.message.mentions:
-                user = ctx.message.mentions[0].id
-            if "--channel" in flags and ctx.message.channel_mentions:
-                channel = ctx.message.channel_mentions[0].id
-            import dateutil.parser as dp  # if unavailable, we can require ISO epoch in future
-            for token in flags.split():
-                if token.startswith("--before="):
-                    before_ts = int(dp.parse(token.split("=", 1)[1]).timestamp())
-                if token.startswith("--after="):
-                    after_ts = int(dp.parse(token.split("=", 1)[1]).timestamp())
+            parsed = _parse_flags(flags)
+            user = ctx.message.mentions[0].id if "user" in parsed and ctx.message.mentions else None
+            channel = ctx.message.channel_mentions[0].id if "channel" in parsed and ctx.message.channel_mentions else None
+            before_ts = int(dp.parse(parsed["before"]).timestamp()) if parsed.get("before") else None
+            after_ts = int(dp.parse(parsed["after"]).timestamp()) if parsed.get("after") else None
             await rag.delete_filtered(guild_id=ctx.guild.id, user_id=user, channel_id=channel, before_ts=before_ts, after_ts=after_ts)
             await ctx.send("Cleared.")
         except Exception:
@@ -226,21 +297,17 @@ class RagSettings(MixinMeta):
     async def rag_export(self, ctx: commands.Context, *, flags: str = ""):
         """Export RAG payloads to a JSON file. Optional filters: --user @x --channel #y"""
         try:
-            from aiuser.rag.client import RAG
-            rag = await RAG.create(self.config)
+            rag = await self._get_rag()
             if not rag:
                 return await ctx.send("RAG disabled or misconfigured")
-            user = None
-            channel = None
-            if "--user" in flags and ctx.message.mentions:
-                user = ctx.message.mentions[0].id
-            if "--channel" in flags and ctx.message.channel_mentions:
-                channel = ctx.message.channel_mentions[0].id
-            data = await rag.export_all(guild_id=ctx.guild.id, user_id=user, channel_id=channel)
-            import json
-            from io import BytesIO
-            buf = BytesIO(json.dumps(data, indent=2).encode("utf-8"))
-            await ctx.author.send(file=discord.File(buf, filename=f"rag_export_{ctx.guild.id}.json"))
+            parsed = _parse_flags(flags)
+            user = ctx.message.mentions[0].id if "user" in parsed and ctx.message.mentions else None
+            channel = ctx.message.channel_mentions[0].id if "channel" in parsed and ctx.message.channel_mentions else None
+            path = await _spool_export(rag.export_all(guild_id=ctx.guild.id, user_id=user, channel_id=channel))
+            try:
+                await ctx.author.send(file=discord.File(path, filename=f"rag_export_{ctx.guild.id}.json"))
+            finally:
+                path.unlink(missing_ok=True)
             await ctx.send("DM'd your export.")
         except Exception:
             await ctx.send("Export failed")
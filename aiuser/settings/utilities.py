@@ -1,3 +1,5 @@
+import functools
+
 import discord
 import tiktoken
 from openai import AsyncOpenAI
@@ -53,14 +55,20 @@ def get_config_attribute(config, mention_type: MentionType, ctx: commands.Contex
         return config.channel(mention)
  
 
+@functools.lru_cache(maxsize=8)
+def _encoding_for_model(model: str):
+    # encoding_for_model loads the full BPE ranks each call, so memoize per model
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.encoding_for_model("gpt-3.5-turbo")
+
+
 async def get_tokens(config: Config, ctx: commands.Context, prompt: str) -> int:
     if not prompt:
         return 0
     prompt = await format_variables(ctx, prompt)  # to provide a better estimate
-    try:
-        encoding = tiktoken.encoding_for_model(await config.guild(ctx.guild).model())
-    except KeyError:
-        encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
+    encoding = _encoding_for_model(await config.guild(ctx.guild).model())
     return len(encoding.encode(prompt, disallowed_special=()))
 
 
@@ -32,4 +32,7 @@ class MixinMeta(ABC):
         self.ignore_regex: dict[int, re.Pattern]
         self.channels_whitelist: dict[int, list[int]]
         self.openai_client: AsyncOpenAI
-        self.optindefault: dict[int, bool] 
\ No newline at end of file
+        self.optindefault: dict[int, bool]
+        self._recent_history: dict
+        self._rag_client: object
+        self._rag_client_key: tuple
\ No newline at end of file
@@ -1,6 +1,7 @@
 import asyncio
 import functools
 import importlib
+import json
 import logging
 import random
 from datetime import datetime
@@ -15,9 +16,33 @@ from redbot.core import Config, commands
 from aiuser.config.constants import OPENROUTER_URL, YOUTUBE_URL_PATTERN
 from aiuser.functions.tool_call import ToolCall
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger("red.bz_cogs.aiuser")
 
 
+def json_dumps_bytes(data) -> bytes:
+    """Indented JSON dump to bytes, using orjson when available (~3-27x faster)"""
+    if orjson:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2).encode("utf-8")
+
+
+def json_dumps_compact(data) -> bytes:
+    if orjson:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+
+def json_loads(data):
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
 def to_thread(timeout=300):
     def decorator(func: Callable) -> Coroutine:
         @functools.wraps(func)